@@ -10,15 +10,69 @@ and returns JSON responses.
 
 from __future__ import annotations
 
-from flask import Flask, render_template, request, jsonify
+from typing import Any
+
+import orjson
+import requests
+from flask import Flask, Response, render_template, request, jsonify
+from flask.json.provider import JSONProvider
 
 from decoder import (
+    validate_vin,
     decode_vin,
+    decode_vins_batch,
+    decode_many,
     parse_vin_result,
-    Car,
 )
 
+
+class ORJSONProvider(JSONProvider):
+    """JSON provider backed by `orjson` for faster response encoding.
+
+    Keys are sorted and non-string keys are accepted, matching Flask's
+    default provider.
+    """
+
+    mimetype = "application/json"
+    options = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, option=self.options).decode()
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        # Hand orjson's bytes straight to the response instead of going
+        # through `dumps`, which would decode them only to re-encode.
+        if args and kwargs:
+            raise TypeError("response() takes either args or kwargs, not both")
+        if len(args) == 1:
+            obj = args[0]
+        else:
+            obj = args or kwargs or None
+        return self._app.response_class(
+            orjson.dumps(obj, option=self.options), mimetype=self.mimetype
+        )
+
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
+
+# Largest number of VINs accepted by one /decode_batch request, so a
+# single client cannot monopolise the shared lookup workers.
+MAX_BATCH_VINS = 250
+
+
+def _batch_unavailable(exc: requests.RequestException) -> bool:
+    """Return whether `exc` means the vPIC batch endpoint is unreachable."""
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+        return True
+    return (
+        isinstance(exc, requests.HTTPError)
+        and exc.response is not None
+        and exc.response.status_code >= 500
+    )
 
 
 @app.route("/", methods=["GET"])
@@ -28,25 +82,73 @@ def index() -> str:
 
 
 @app.route("/decode", methods=["POST"])
-def decode() -> tuple[str, int] | tuple[dict, int]:
+def decode() -> tuple[Response, int]:
     """Handle form submissions for VIN decoding.
 
     The endpoint returns a JSON response containing either a `car` key
     when decoding succeeds or an `error` key when input is invalid or
     a lookup fails.  The `car` value is a dictionary containing only
-    defined fields (see `Car.to_dict`).
+    defined fields (see `Car.as_dict`).
     """
-    vin = request.form.get("vin", "").strip().upper()
+    raw_vin = request.form.get("vin", "")
+    vin = raw_vin.strip().upper() if raw_vin else ""
+    if not vin:
+        return jsonify({"error": "Please provide a VIN."}), 400
+    # Reject malformed VINs before touching any other input.
+    if not validate_vin(vin):
+        return jsonify({"error": "Invalid VIN"}), 400
     year = request.form.get("year", "").strip()
-    if vin:
+    if year and not (year.isascii() and year.isdigit()):
+        return jsonify({"error": "Invalid model year"}), 400
+    try:
+        raw = decode_vin(vin, year or None)
+        car = parse_vin_result(vin, raw)
+        return jsonify({"car": car.as_dict}), 200
+    except Exception as exc:
+        return jsonify({"error": str(exc)}), 500
+
+
+@app.route("/decode_batch", methods=["POST"])
+def decode_batch() -> tuple[Response, int]:
+    """Decode a JSON list of VINs in as few vPIC requests as possible.
+
+    The request body must be a JSON array of at most `MAX_BATCH_VINS`
+    VIN strings; larger requests are rejected with 413.  The response
+    contains a `cars` list with one entry per VIN, in request order, or
+    an `error` key when input is invalid or the lookup fails.
+    """
+    payload = request.get_json(silent=True)
+    if (
+        not isinstance(payload, list)
+        or not payload
+        or not all(isinstance(vin, str) for vin in payload)
+    ):
+        error = "Please provide a JSON list of VINs."
+        return jsonify({"error": error}), 400
+    if len(payload) > MAX_BATCH_VINS:
+        error = f"At most {MAX_BATCH_VINS} VINs per request."
+        return jsonify({"error": error}), 413
+    vins = [vin.strip().upper() for vin in payload]
+    invalid = [vin for vin in vins if not validate_vin(vin)]
+    if invalid:
+        return jsonify({"error": "Invalid VIN", "invalid": invalid}), 400
+    try:
         try:
-            raw = decode_vin(vin, year or None)
-            car = parse_vin_result(vin, raw)
-            return jsonify({"car": car.to_dict()}), 200
-        except Exception as exc:
-            return jsonify({"error": str(exc)}), 500
-    else:
-        return jsonify({"error": "Please provide a VIN."}), 400
+            raws = decode_vins_batch(vins)
+        except requests.RequestException as exc:
+            # Fall back to concurrent single-VIN lookups only if the batch
+            # endpoint is unavailable; throttling (429) and other client
+            # errors are reported rather than fanned out as more requests.
+            if not _batch_unavailable(exc):
+                raise
+            raws = decode_many((vin, None) for vin in vins)
+        cars = [
+            parse_vin_result(vin, raw).as_dict
+            for vin, raw in zip(vins, raws)
+        ]
+        return jsonify({"cars": cars}), 200
+    except Exception as exc:
+        return jsonify({"error": str(exc)}), 500
 
 
 if __name__ == "__main__":
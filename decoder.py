@@ -5,102 +5,310 @@ decoder.py
 Helper functions and data models used by the vehicle decoder application.
 
 The module includes:
-  * `Car`: a dataclass representing a vehicle with common attributes.
+  * `Car`: the vehicle dataclass, re‑exported from `models.py`.
+  * `validate_vin`: an offline format and check‑digit test for VINs.
   * `decode_vin`: a helper that queries the NHTSA vPIC API to decode a VIN
     into a flat JSON dictionary【311902232095331†L68-L99】.
+  * `decode_vins_batch`: decode many VINs with the vPIC batch endpoint.
+  * `decode_many`: decode many VINs with concurrent single lookups.
   * `parse_vin_result`: convert the raw vPIC result into a `Car`.
+
+Both `decode_vin` and `decode_vins_batch` return vPIC results limited
+to the fields `parse_vin_result` reads (see `_VPIC_KEYS`), so cached
+and batch results do not hold the ~130 other fields of each response.
 """
 
 from __future__ import annotations
 
-# Note: Car is defined in models.py to follow MVC separation.
-from dataclasses import dataclass, asdict  # kept for backward compatibility of old imports
-from typing import Optional, Dict, Any
+import atexit
+import hashlib
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from operator import mul
+from typing import Optional, Dict, Any, Iterable, List, Tuple
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import redis
+except ImportError:  # redis is only needed when REDIS_URL is set
+    redis = None  # type: ignore
+
+# Car lives in models.py; it is re-exported here so callers can continue
+# to import it from decoder for backward compatibility.
+from models import Car
 
 __all__ = [
+    "Car",
+    "validate_vin",
     "decode_vin",
+    "decode_vins_batch",
+    "decode_many",
     "parse_vin_result",
 ]
 
 
-# Import the Car dataclass from the models module.  Keeping the import
-# here prevents circular dependencies and ensures that callers can
-# continue to import Car from decoder for backward compatibility.  If
-# `models.py` isn't available (e.g., running as a standalone script),
-# define a minimal Car dataclass locally as a fallback.
-try:
-    from .models import Car  # type: ignore
-except Exception:
-    @dataclass
-    class Car:  # type: ignore
-        """Fallback Car dataclass when models isn't available."""
+# vPIC endpoints used by the decoder.
+_VPIC_BASE = "https://vpic.nhtsa.dot.gov/api/vehicles/DecodeVinValues/"
+_VPIC_BATCH_URL = "https://vpic.nhtsa.dot.gov/api/vehicles/DecodeVINValuesBatch/"
+
+# A single pooled session shared by all lookups.  Reusing it keeps the
+# TCP/TLS connection to vpic.nhtsa.dot.gov alive between requests instead
+# of paying the handshake cost on every decode, and transient failures
+# are retried on the pooled connection.  requests already advertises
+# brotli in Accept-Encoding because `brotli` is installed.
+#
+# Worst case per call: up to 4 attempts, each allowed the caller's
+# `timeout=10` to connect and again per read, plus about 1.2s of backoff
+# (0, 0.4 and 0.8s).  A vPIC that times out every attempt therefore holds
+# a call for roughly 40s, or longer if both connect and read stall.
+_session = requests.Session()
+_session.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=100,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.2,
+            status_forcelist=[429, 502, 503, 504],
+            # Both vPIC endpoints are read-only, so POSTs to the batch
+            # endpoint are as safe to retry as GETs.
+            allowed_methods=["GET", "POST"],
+            # vPIC's Retry-After on 429/503 can ask for hours of waiting
+            # (urllib3 1.26 does not cap it), which would pin a request
+            # thread; rely on the short exponential backoff instead.
+            respect_retry_after_header=False,
+            # Return the last response once retries are exhausted so
+            # callers' raise_for_status() reports the real status.
+            raise_on_status=False,
+        ),
+    ),
+)
+atexit.register(_session.close)
+
+# Worker threads used to issue independent vPIC requests concurrently.
+# The adapter's `pool_maxsize` above is well over this so every worker
+# (plus the web server's own threads) can hold a pooled connection.
+_executor = ThreadPoolExecutor(max_workers=16)
+
+# Optional Redis cache shared by all worker processes, enabled by setting
+# REDIS_URL.  Entries expire after 30 days.
+_REDIS_TTL = 30 * 24 * 60 * 60
+_redis = None
+if redis is not None and os.environ.get("REDIS_URL"):
+    _redis = redis.Redis(
+        connection_pool=redis.ConnectionPool.from_url(
+            os.environ["REDIS_URL"], socket_timeout=1
+        )
+    )
+
+# The vPIC batch endpoint accepts at most this many VINs per request.
+_BATCH_SIZE = 50
+
+
+# VINs are 17 characters drawn from digits and capital letters other
+# than I, O and Q.
+_VIN_RE = re.compile(r"[A-HJ-NPR-Z0-9]{17}")
+
+# ISO 3779 transliteration of VIN characters to numeric values, as a
+# `bytes.translate` table, and the per-position weights used to compute
+# the check digit (position 9).
+_VIN_TRANSLIT = bytes.maketrans(
+    b"0123456789ABCDEFGHJKLMNPRSTUVWXYZ",
+    bytes((0, 1, 2, 3, 4, 5, 6, 7, 8, 9,
+           1, 2, 3, 4, 5, 6, 7, 8,
+           1, 2, 3, 4, 5, 7, 9,
+           2, 3, 4, 5, 6, 7, 8, 9)),
+)
+_VIN_WEIGHTS = (8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2)
+_VIN_CHECK_CHARS = "0123456789X"
 
-        vin: Optional[str] = None
-        year: Optional[str] = None
-        make: Optional[str] = None
-        model: Optional[str] = None
-        body_style: Optional[str] = None
-        engine: Optional[str] = None
-        assembly: Optional[str] = None
-        description: Optional[str] = None
 
-        def to_dict(self) -> Dict[str, Any]:
-            return {k: v for k, v in asdict(self).items() if v not in (None, "")}
+def validate_vin(vin: str) -> bool:
+    """Return whether `vin` is well formed and has a correct check digit.
 
+    This runs entirely offline so obviously invalid input can be
+    rejected without a vPIC round-trip.
+    """
+    if not _VIN_RE.fullmatch(vin):
+        return False
+    values = vin.encode("ascii").translate(_VIN_TRANSLIT)
+    total = sum(map(mul, values, _VIN_WEIGHTS))
+    return vin[8] == _VIN_CHECK_CHARS[total % 11]
+
+
+# `Car` attributes copied verbatim from the vPIC result, as
+# (attribute, vPIC key) pairs.
+_VIN_FIELDS = (
+    ("year", "ModelYear"),
+    ("make", "Make"),
+    ("model", "Model"),
+    ("body_style", "BodyClass"),
+    ("assembly", "PlantCountry"),
+)
+
+# Every vPIC key read by `parse_vin_result`.  Both decoders keep only
+# these, so results skip the ~130 other fields in each response.
+_VPIC_KEYS = tuple(key for _, key in _VIN_FIELDS) + (
+    "EngineCylinders",
+    "DisplacementL",
+    "FuelTypePrimary",
+    "Series",
+    "Trim",
+)
+
+
+# Redis keys carry a short hash of `_VPIC_KEYS`, so entries trimmed to an
+# older field set are never served after the set changes.
+_VPIC_KEYS_HASH = hashlib.sha1(",".join(_VPIC_KEYS).encode()).hexdigest()
+_REDIS_KEY_PREFIX = f"vin:{_VPIC_KEYS_HASH[:8]}:"
 
+
+def _trim_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop the vPIC fields that `parse_vin_result` does not use."""
+    return {key: result[key] for key in _VPIC_KEYS if key in result}
+
+
+@lru_cache(maxsize=4096)
 def decode_vin(vin: str, model_year: Optional[str] = None) -> Dict[str, Any]:
     """Decode a VIN using the NHTSA vPIC API.
 
+    Results are memoized per `(vin, model_year)` since vPIC answers
+    for a given VIN do not change: in process, and in Redis when
+    REDIS_URL is configured.  The returned dictionary is shared
+    between callers and must be treated as read-only.
+
     Args:
         vin: A 17‑character vehicle identification number.
         model_year: Optional model year to improve decoding accuracy.
 
     Returns:
         A flat dictionary representing decoded values from the vPIC
-        API【311902232095331†L68-L99】.
+        API【311902232095331†L68-L99】, limited to the fields used by
+        `parse_vin_result`.
 
     Raises:
         requests.RequestException: on network failures.
-        ValueError: if the API returns an unexpected result.
+        ValueError: if `model_year` is not numeric or the API returns
+            an unexpected result.
     """
-    base_url = "https://vpic.nhtsa.dot.gov/api/vehicles/DecodeVinValues/"
-    url = f"{base_url}{vin}"
-    params: Dict[str, str] = {"format": "json"}
+    if _redis is None:
+        return _fetch_vin(vin, model_year)
+    key = f"{_REDIS_KEY_PREFIX}{vin}:{model_year or ''}"
+    try:
+        cached = _redis.get(key)
+    except redis.RedisError:
+        cached = None
+    if cached:
+        try:
+            return orjson.loads(cached)
+        except orjson.JSONDecodeError:
+            pass  # corrupt entry: treat as a miss and overwrite it below
+    result = _fetch_vin(vin, model_year)
+    try:
+        _redis.setex(key, _REDIS_TTL, orjson.dumps(result))
+    except redis.RedisError:
+        pass
+    return result
+
+
+def _fetch_vin(vin: str, model_year: Optional[str]) -> Dict[str, Any]:
+    """Query vPIC for a single VIN; see `decode_vin`."""
+    # The query string is built directly rather than passed through
+    # `params` encoding; model_year is restricted to ASCII digits so it
+    # never needs escaping.
+    url = f"{_VPIC_BASE}{vin}?format=json"
     if model_year:
-        params["modelyear"] = model_year
-    response = requests.get(url, params=params, timeout=10)
+        if not (model_year.isascii() and model_year.isdigit()):
+            raise ValueError("Model year must be numeric")
+        url = f"{url}&modelyear={model_year}"
+    response = _session.get(url, timeout=10)
     response.raise_for_status()
-    data = response.json()
+    data = orjson.loads(response.content)
     results = data.get("Results", [])
     if not results:
         raise ValueError("Unexpected response structure from NHTSA API")
-    return results[0]
+    return _trim_result(results[0])
+
+
+def _decode_batch_chunk(vins: List[str]) -> List[Dict[str, Any]]:
+    """POST one chunk of at most `_BATCH_SIZE` VINs to the batch endpoint."""
+    response = _session.post(
+        _VPIC_BATCH_URL,
+        data={"format": "json", "data": ";".join(vins)},
+        timeout=10,
+    )
+    response.raise_for_status()
+    data = orjson.loads(response.content)
+    results = data.get("Results", [])
+    if len(results) != len(vins):
+        raise ValueError("Unexpected response structure from NHTSA API")
+    return [_trim_result(result) for result in results]
+
+
+def decode_vins_batch(vins: List[str]) -> List[Dict[str, Any]]:
+    """Decode several VINs using the vPIC `DecodeVINValuesBatch` endpoint.
+
+    VINs are sent in chunks of up to 50, the limit imposed by the API,
+    and chunks are requested concurrently.
+
+    Args:
+        vins: The VINs to decode.
+
+    Returns:
+        One flat result dictionary per VIN, in the same order as `vins`,
+        limited to the fields used by `parse_vin_result`.
+
+    Raises:
+        requests.RequestException: on network failures.
+        ValueError: if the API returns an unexpected result.
+    """
+    chunks = [
+        vins[i:i + _BATCH_SIZE] for i in range(0, len(vins), _BATCH_SIZE)
+    ]
+    if len(chunks) == 1:
+        return _decode_batch_chunk(chunks[0])
+    results: List[Dict[str, Any]] = []
+    for chunk_results in _executor.map(_decode_batch_chunk, chunks):
+        results.extend(chunk_results)
+    return results
+
+
+def decode_many(
+    pairs: Iterable[Tuple[str, Optional[str]]],
+) -> List[Dict[str, Any]]:
+    """Decode `(vin, model_year)` pairs with concurrent `decode_vin` calls.
+
+    Useful when the batch endpoint is unavailable; lookups overlap on
+    the shared worker pool and still benefit from the `decode_vin`
+    cache.  Results are returned in input order.
+    """
+    return list(_executor.map(lambda pair: decode_vin(*pair), pairs))
 
 
 def parse_vin_result(vin: str, result: Dict[str, Any]) -> Car:
     """Convert a vPIC response into a `Car` object."""
-    car = Car()
-    car.vin = vin
-    car.year = result.get("ModelYear") or None
-    car.make = result.get("Make") or None
-    car.model = result.get("Model") or None
-    car.body_style = result.get("BodyClass") or None
+    kwargs: Dict[str, Any] = {
+        attr: result.get(key) or None for attr, key in _VIN_FIELDS
+    }
     # Build a simple engine description
-    cylinders = result.get("EngineCylinders") or ""
-    disp_l = result.get("DisplacementL") or ""
-    fuel = result.get("FuelTypePrimary") or ""
     parts: list[str] = []
+    append = parts.append
+    cylinders = result.get("EngineCylinders")
     if cylinders:
-        parts.append(f"{cylinders}-cyl")
+        append(cylinders + "-cyl")
+    disp_l = result.get("DisplacementL")
     if disp_l:
-        parts.append(f"{disp_l}L")
+        append(disp_l + "L")
+    fuel = result.get("FuelTypePrimary")
     if fuel:
-        parts.append(fuel)
-    car.engine = " ".join(parts) if parts else None
-    car.assembly = result.get("PlantCountry") or None
-    description = result.get("Series") or result.get("Trim") or None
-    car.description = description
-    return car
-
+        append(fuel)
+    kwargs["engine"] = " ".join(parts) or None
+    kwargs["description"] = result.get("Series") or result.get("Trim") or None
+    return Car(vin=vin, **kwargs)
@@ -9,19 +9,27 @@ view (HTML templates).  Here we provide a single `Car` data class
 representing vehicle attributes.
 """
 
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, fields
 from typing import Optional, Any, Dict
 
 __all__ = ["Car"]
 
 
-@dataclass
-class Car:
+class _DictCache:
+    """Slot holding a model's cached dict form outside its dataclass fields."""
+
+    __slots__ = ("_as_dict",)
+
+
+@dataclass(frozen=True, slots=True)
+class Car(_DictCache):
     """Representation of a vehicle.
 
     Each attribute is optional because not all decoding services
-    return every possible field.  Use the `to_dict()` method to
-    serialize an instance to a dict while omitting undefined fields.
+    return every possible field.  Instances are immutable, so the
+    serialized form is computed on first use and then reused; use
+    `as_dict` (shared, read-only) or `to_dict()` (a copy) to get it as
+    a dict omitting undefined fields.
     """
 
     vin: Optional[str] = None
@@ -33,6 +41,27 @@ class Car:
     assembly: Optional[str] = None
     description: Optional[str] = None
 
+    @property
+    def as_dict(self) -> Dict[str, Any]:
+        """Attributes that are not None or empty.  Treat as read-only."""
+        try:
+            return self._as_dict
+        except AttributeError:
+            as_dict = {
+                k: v
+                for k in _CAR_FIELDS
+                if (v := getattr(self, k)) not in (None, "")
+            }
+            object.__setattr__(self, "_as_dict", as_dict)
+            return as_dict
+
     def to_dict(self) -> Dict[str, Any]:
-        """Return a dict containing only attributes that are not None or empty."""
-        return {k: v for k, v in asdict(self).items() if v not in (None, "")}
+        """Return a dict containing only attributes that are not None or empty.
+
+        The result is a fresh copy that callers may modify; use `as_dict`
+        to avoid the copy when the dict is only read.
+        """
+        return dict(self.as_dict)
+
+
+_CAR_FIELDS = tuple(f.name for f in fields(Car))